@@ -3,9 +3,11 @@ from functools import reduce
 from typing import Optional, Any, List
 
 from sqlalchemy import (
+    BigInteger,
     Integer,
     ForeignKey,
     Enum,
+    Index,
     select,
     update,
     ColumnElement,
@@ -22,27 +24,42 @@ from suppgram.frontends.telegram.storage import (
     TelegramMessageKind,
     TelegramChatRole,
 )
-from suppgram.storages.sqlalchemy.models import Base, Conversation, Customer, Agent
+from suppgram.storages.sqlalchemy.models import (
+    Base,
+    Conversation,
+    Customer,
+    Agent,
+    create_missing_tables,
+)
 
 
 class TelegramChat(Base):
     __tablename__ = "suppgram_telegram_chats"
-    telegram_chat_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    telegram_chat_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
     roles: Mapped[int] = mapped_column(Integer, default=0)
-    messages: Mapped[List["TelegramMessage"]] = relationship(back_populates="chat")
+    messages: Mapped[List["TelegramMessage"]] = relationship(back_populates="chat", lazy="raise")
 
 
 class TelegramMessage(Base):
     __tablename__ = "suppgram_telegram_messages"
+    __table_args__ = (
+        Index(
+            "ix_suppgram_telegram_messages_chat_id_telegram_message_id",
+            "chat_id",
+            "telegram_message_id",
+        ),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     chat_id: Mapped[int] = mapped_column(ForeignKey(TelegramChat.telegram_chat_id), nullable=False)
-    telegram_bot_id: Mapped[int] = mapped_column(Integer, nullable=False)
-    chat: Mapped[TelegramChat] = relationship(back_populates="messages")
+    telegram_bot_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    chat: Mapped[TelegramChat] = relationship(back_populates="messages", lazy="raise_on_sql")
     telegram_message_id: Mapped[int] = mapped_column(Integer, nullable=False)
     kind: Mapped[TelegramMessageKind] = mapped_column(Enum(TelegramMessageKind), nullable=False)
     agent_id: Mapped[int] = mapped_column(ForeignKey(Agent.id), nullable=True)
     customer_id: Mapped[int] = mapped_column(ForeignKey(Customer.id), nullable=True)
-    conversation_id: Mapped[int] = mapped_column(ForeignKey(Conversation.id), nullable=True)
+    conversation_id: Mapped[int] = mapped_column(
+        ForeignKey(Conversation.id), nullable=True, index=True
+    )
     telegram_bot_username: Mapped[str] = mapped_column(String, nullable=True)
 
 
@@ -62,7 +79,8 @@ class SQLAlchemyTelegramBridge(TelegramStorage):
             message_model: SQLAlchemy model for Telegram messages
         """
         self._engine = engine
-        self._session = async_sessionmaker(bind=engine)
+        # Same session settings as in `SQLAlchemyStorage`.
+        self._session = async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
         self._chat_model = chat_model
         self._message_model = message_model
 
@@ -77,7 +95,7 @@ class SQLAlchemyTelegramBridge(TelegramStorage):
             if model is built_in_model
         ]
         async with self._engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all, tables=tables_to_create)
+            await conn.run_sync(create_missing_tables, tables_to_create)
 
     async def get_chats_by_role(self, role: TelegramChatRole) -> List[TelegramGroupInterface]:
         select_query = select(self._chat_model).filter(
@@ -92,7 +110,7 @@ class SQLAlchemyTelegramBridge(TelegramStorage):
             self._chat_model.telegram_chat_id == telegram_chat_id
         )
         async with self._session() as session:
-            chat = (await session.execute(select_query)).scalars().one()
+            chat = (await session.execute(select_query)).scalar_one()
             return self._convert_chat(chat)
 
     async def create_or_update_chat(self, telegram_chat_id: int) -> TelegramGroupInterface:
@@ -100,7 +118,7 @@ class SQLAlchemyTelegramBridge(TelegramStorage):
             query = select(self._chat_model).filter(
                 self._chat_model.telegram_chat_id == telegram_chat_id
             )
-            chat = (await session.execute(query)).scalars().one_or_none()
+            chat = (await session.execute(query)).scalar_one_or_none()
             if chat is None:
                 chat = self._chat_model(telegram_chat_id=telegram_chat_id)  # type: ignore
                 session.add(chat)
@@ -153,7 +171,6 @@ class SQLAlchemyTelegramBridge(TelegramStorage):
             )
             session.add(message)
             await session.flush()
-            await session.refresh(message)
             return self._convert_message(message, chat)
 
     async def get_message(
@@ -166,7 +183,7 @@ class SQLAlchemyTelegramBridge(TelegramStorage):
             select(self._message_model).options(joinedload(self._message_model.chat)).where(filter_)
         )
         async with self._session() as session:
-            msg = (await session.execute(select_query)).scalars().one()
+            msg = (await session.execute(select_query)).scalar_one()
             return self._convert_message(msg, self._convert_chat(msg.chat))
 
     async def get_messages(
@@ -1,6 +1,6 @@
 import logging
 from importlib import import_module
-from typing import Optional, List, Any, Iterable, cast, Union
+from typing import Optional, List, Any, Iterable, cast, Union, Mapping
 from uuid import UUID, uuid4
 
 from suppgram.analytics import Reporter
@@ -89,19 +89,24 @@ class Builder:
         self._storage = storage
         return self
 
-    def with_sqlalchemy_storage(self, sqlalchemy_uri: str) -> "Builder":
-        """Configure [SQLAlchemyStorage][suppgram.storages.sqlalchemy.SQLAlchemyStorage]."""
+    def with_sqlalchemy_storage(
+        self, sqlalchemy_uri: str, engine_options: Optional[Mapping[str, Any]] = None
+    ) -> "Builder":
+        """Configure [SQLAlchemyStorage][suppgram.storages.sqlalchemy.SQLAlchemyStorage].
+
+        Parameters:
+            sqlalchemy_uri: SQLAlchemy connection URI.
+            engine_options: see `suppgram.storages.sqlalchemy.make_async_engine()`.
+        """
         if self._storage is not None:
             raise ValueError(
                 f"can't use SQLAlchemy storage — already instantiated {type(self._storage).__name__}"
             )
 
         from suppgram.storages.sqlalchemy.models import Models
-        from suppgram.storages.sqlalchemy.storage import SQLAlchemyStorage
-
-        from sqlalchemy.ext.asyncio import create_async_engine
+        from suppgram.storages.sqlalchemy.storage import SQLAlchemyStorage, make_async_engine
 
-        self._sqlalchemy_engine = create_async_engine(sqlalchemy_uri)
+        self._sqlalchemy_engine = make_async_engine(sqlalchemy_uri, engine_options)
         sqlalchemy_models = Models(engine=self._sqlalchemy_engine)
         self._storage = SQLAlchemyStorage(
             engine=self._sqlalchemy_engine,
@@ -1,6 +1,22 @@
 import asyncio
 import re
-from typing import Iterable, Awaitable, Optional, AsyncIterator, Tuple, TypeVar
+import time
+from collections import OrderedDict
+from typing import (
+    Iterable,
+    Awaitable,
+    Optional,
+    AsyncIterator,
+    Tuple,
+    TypeVar,
+    Generic,
+    Callable,
+    Hashable,
+    List,
+    Mapping,
+    Dict,
+    Set,
+)
 
 
 async def flat_gather(futures: Iterable[Awaitable]):
@@ -42,3 +58,152 @@ async def aenumerate(asequence: AsyncIterator[T], start=0) -> AsyncIterator[Tupl
     async for elem in asequence:
         yield n, elem
         n += 1
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class BatchLoader(Generic[K, V]):
+    """Coalesces loads of individual keys requested during the same event loop
+    iteration into a single call of the batch loading function (so-called DataLoader
+    pattern). Useful to turn many concurrent single-row lookups into one query."""
+
+    def __init__(self, load_batch: Callable[[List[K]], Awaitable[Mapping[K, V]]]):
+        """
+        Parameters:
+            load_batch: function loading values for a list of distinct keys.
+                        Keys missing from the returned mapping are loaded as `None`.
+        """
+        self._load_batch = load_batch
+        self._pending: Dict[K, "asyncio.Future[Optional[V]]"] = {}
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+    async def load(self, key: K) -> Optional[V]:
+        loop = asyncio.get_running_loop()
+        future = self._pending.get(key)
+        if future is None:
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            future = self._pending[key] = loop.create_future()
+        # Shielding so that cancelling one caller doesn't cancel the load for others.
+        return await asyncio.shield(future)
+
+    def _dispatch(self):
+        pending, self._pending = self._pending, {}
+        task = asyncio.ensure_future(self._resolve(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, pending: Dict[K, "asyncio.Future[Optional[V]]"]):
+        try:
+            try:
+                values = await self._load_batch(list(pending))
+            except Exception as exc:
+                for future in pending.values():
+                    if not future.done():
+                        future.set_exception(exc)
+                return
+            for key, future in pending.items():
+                if not future.done():
+                    future.set_result(values.get(key))
+        finally:
+            # Interrupted (e.g. cancelled on shutdown): callers must not wait forever.
+            for future in pending.values():
+                if not future.done():
+                    future.cancel()
+
+
+class BatchWriter(Generic[T]):
+    """Coalesces writes of individual items requested during the same event loop
+    iteration into a single call of the batch writing function. Counterpart of
+    `BatchLoader` for inserts, turning many concurrent single-row writes into one."""
+
+    def __init__(self, write_batch: Callable[[List[T]], Awaitable[List[Optional[Exception]]]]):
+        """
+        Parameters:
+            write_batch: function writing a list of items and returning, for each item,
+                         either an exception to raise to its writer or `None` on success.
+        """
+        self._write_batch = write_batch
+        self._pending: List[Tuple[T, "asyncio.Future[None]"]] = []
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+    async def write(self, item: T):
+        loop = asyncio.get_running_loop()
+        if not self._pending:
+            loop.call_soon(self._dispatch)
+        future = loop.create_future()
+        self._pending.append((item, future))
+        # Shielding so that cancelling one writer doesn't cancel the write for others.
+        await asyncio.shield(future)
+
+    def _dispatch(self):
+        pending, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._resolve(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, pending: List[Tuple[T, "asyncio.Future[None]"]]):
+        try:
+            try:
+                errors = await self._write_batch([item for item, _ in pending])
+            except Exception as exc:
+                errors = [exc] * len(pending)
+            for (_, future), error in zip(pending, errors):
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+        finally:
+            # Interrupted (e.g. cancelled on shutdown): writers must not wait forever.
+            for _, future in pending:
+                if not future.done():
+                    future.cancel()
+
+
+class SingleFlight(Generic[K, V]):
+    """Deduplicates concurrent calls for the same key: while a call is in flight,
+    other callers with an equal key await its result instead of repeating it."""
+
+    def __init__(self) -> None:
+        self._in_flight: Dict[K, "asyncio.Future[V]"] = {}
+
+    async def do(self, key: K, func: Callable[[], Awaitable[V]]) -> V:
+        future = self._in_flight.get(key)
+        if future is None:
+            future = self._in_flight[key] = asyncio.ensure_future(func())
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shielding so that cancelling one caller doesn't cancel the call for others.
+        return await asyncio.shield(future)
+
+
+class TTLCache(Generic[K, V]):
+    """Simple in-process cache with entries expiring after given time
+    and least recently set entries evicted when the size limit is reached."""
+
+    def __init__(self, ttl_seconds: float, max_size: int = 1024):
+        self._ttl_seconds = ttl_seconds
+        self._max_size = max_size
+        self._entries: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+
+    def get(self, key: K) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+
+    def set(self, key: K, value: V):
+        self._entries[key] = (time.monotonic() + self._ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
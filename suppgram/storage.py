@@ -86,6 +86,12 @@ class Storage(abc.ABC):
     async def get_or_create_conversation(self, customer: Customer) -> Conversation:
         pass
 
+    async def get_or_create_conversations(self, customers: List[Customer]) -> List[Conversation]:
+        """Batch version of `get_or_create_conversation()`, returning conversations
+        in the same order as customers. Storages may override it to avoid
+        querying database once per customer."""
+        return [await self.get_or_create_conversation(customer) for customer in customers]
+
     @abc.abstractmethod
     async def find_conversations_by_ids(
         self, conversation_ids: List[Any], with_messages: bool = False
@@ -126,10 +132,22 @@ class Storage(abc.ABC):
     async def save_message(self, conversation: Conversation, message: Message):
         pass
 
+    async def save_messages(self, conversation: Conversation, messages: List[Message]):
+        """Batch version of `save_message()`. Storages may override it to save
+        all messages within a single transaction."""
+        for message in messages:
+            await self.save_message(conversation, message)
+
     @abc.abstractmethod
     async def save_event(self, event: Event):
         pass
 
+    async def save_events(self, events: List[Event]):
+        """Batch version of `save_event()`. Storages may override it to save
+        all events within a single transaction."""
+        for event in events:
+            await self.save_event(event)
+
     @abc.abstractmethod
     def find_all_events(self) -> AsyncIterator[Event]:
         """Iterate over all stored events in chronological order."""
@@ -1,2 +1,7 @@
 from .models import Models  # noqa
-from .storage import SQLAlchemyStorage  # noqa
+from .storage import (  # noqa
+    SQLAlchemyStorage,
+    DEFAULT_ENGINE_OPTIONS,
+    DEFAULT_ASYNCPG_CONNECT_ARGS,
+    make_async_engine,
+)
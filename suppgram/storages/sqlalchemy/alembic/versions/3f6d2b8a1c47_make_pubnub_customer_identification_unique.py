@@ -0,0 +1,30 @@
+"""Make PubNub customer identification unique
+
+Revision ID: 3f6d2b8a1c47
+Revises: 9c1e4a7b2d30
+Create Date: 2026-10-15 22:47:03.218640
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "3f6d2b8a1c47"
+down_revision = "9c1e4a7b2d30"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("suppgram_customers") as batch_op:
+        batch_op.create_unique_constraint(
+            "suppgram_customers_pubnub_user_id_pubnub_channel_id_key",
+            ["pubnub_user_id", "pubnub_channel_id"],
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("suppgram_customers") as batch_op:
+        batch_op.drop_constraint(
+            "suppgram_customers_pubnub_user_id_pubnub_channel_id_key", type_="unique"
+        )
@@ -0,0 +1,34 @@
+"""Add workplace and conversation lookup indexes
+
+Revision ID: 5a0e3c9d7b12
+Revises: 3f6d2b8a1c47
+Create Date: 2026-10-15 22:53:37.840215
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "5a0e3c9d7b12"
+down_revision = "3f6d2b8a1c47"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_suppgram_workplaces_agent_id_telegram_bot_id",
+        "suppgram_workplaces",
+        ["agent_id", "telegram_bot_id"],
+        unique=True,
+    )
+    op.create_index(
+        "ix_suppgram_conversations_customer_id_state",
+        "suppgram_conversations",
+        ["customer_id", "state"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_suppgram_conversations_customer_id_state", "suppgram_conversations")
+    op.drop_index("ix_suppgram_workplaces_agent_id_telegram_bot_id", "suppgram_workplaces")
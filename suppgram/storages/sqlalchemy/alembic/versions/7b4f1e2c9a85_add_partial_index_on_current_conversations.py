@@ -0,0 +1,34 @@
+"""Add partial index on current conversations
+
+Revision ID: 7b4f1e2c9a85
+Revises: 5a0e3c9d7b12
+Create Date: 2026-10-15 22:58:12.406731
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7b4f1e2c9a85"
+down_revision = "5a0e3c9d7b12"
+branch_labels = None
+depends_on = None
+
+
+RESOLVED_STATE_CODE = 2
+
+
+def upgrade() -> None:
+    predicate = sa.text(f"state != {RESOLVED_STATE_CODE}")
+    op.create_index(
+        "ix_suppgram_conversations_current_customer_id",
+        "suppgram_conversations",
+        ["customer_id"],
+        postgresql_where=predicate,
+        sqlite_where=predicate,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_suppgram_conversations_current_customer_id", "suppgram_conversations")
@@ -0,0 +1,40 @@
+"""Store conversation state as small integer
+
+Revision ID: 9c1e4a7b2d30
+Revises: 48f9a7635310
+Create Date: 2026-10-15 10:12:41.503117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9c1e4a7b2d30"
+down_revision = "48f9a7635310"
+branch_labels = None
+depends_on = None
+
+
+STATES = ["NEW", "ASSIGNED", "RESOLVED"]
+
+
+def upgrade() -> None:
+    op.add_column("suppgram_conversations", sa.Column("state_code", sa.SmallInteger()))
+    cases = " ".join(f"WHEN '{state}' THEN {code}" for code, state in enumerate(STATES))
+    op.execute(f"UPDATE suppgram_conversations SET state_code = CASE state {cases} END")
+    with op.batch_alter_table("suppgram_conversations") as batch_op:
+        batch_op.drop_column("state")
+        batch_op.alter_column("state_code", new_column_name="state", nullable=False)
+    sa.Enum(*STATES, name="conversationstate").drop(op.get_bind(), checkfirst=True)
+
+
+def downgrade() -> None:
+    state_enum = sa.Enum(*STATES, name="conversationstate")
+    state_enum.create(op.get_bind(), checkfirst=True)
+    op.add_column("suppgram_conversations", sa.Column("state_name", state_enum))
+    cases = " ".join(f"WHEN {code} THEN '{state}'" for code, state in enumerate(STATES))
+    op.execute(f"UPDATE suppgram_conversations SET state_name = CASE state {cases} END")
+    with op.batch_alter_table("suppgram_conversations") as batch_op:
+        batch_op.drop_column("state")
+        batch_op.alter_column("state_name", new_column_name="state", nullable=False)
@@ -0,0 +1,74 @@
+"""Store event enumerations as small integers
+
+Revision ID: a8e5c1f7d240
+Revises: f1d3b6a8c572
+Create Date: 2026-10-16 00:21:40.381257
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a8e5c1f7d240"
+down_revision = "f1d3b6a8c572"
+branch_labels = None
+depends_on = None
+
+
+EVENT_KINDS = [
+    "AGENT_ASSIGNED",
+    "CONVERSATION_POSTPONED",
+    "CONVERSATION_RATED",
+    "CONVERSATION_RESOLVED",
+    "CONVERSATION_STARTED",
+    "CONVERSATION_TAG_ADDED",
+    "CONVERSATION_TAG_REMOVED",
+    "MESSAGE_SENT",
+]
+MESSAGE_KINDS = ["FROM_CUSTOMER", "FROM_AGENT", "POSTPONED", "RESOLVED"]
+MESSAGE_MEDIA_KINDS = ["NONE", "TEXT"]
+
+# Column, member names in code order, enumeration type name, nullability.
+COLUMNS = [
+    ("kind", EVENT_KINDS, "eventkind", False),
+    ("message_kind", MESSAGE_KINDS, "messagekind", True),
+    ("message_media_kind", MESSAGE_MEDIA_KINDS, "messagemediakind", True),
+]
+
+# Events table used to be created by `SQLAlchemyStorage.initialize()` only,
+# so it may be missing from databases managed by migrations.
+
+
+def _has_events_table() -> bool:
+    return sa.inspect(op.get_bind()).has_table("suppgram_events")
+
+
+def upgrade() -> None:
+    if _has_events_table():
+        for column, names, _, nullable in COLUMNS:
+            op.add_column("suppgram_events", sa.Column(f"{column}_code", sa.SmallInteger()))
+            cases = " ".join(f"WHEN '{name}' THEN {code}" for code, name in enumerate(names))
+            op.execute(f"UPDATE suppgram_events SET {column}_code = CASE {column} {cases} END")
+            with op.batch_alter_table("suppgram_events") as batch_op:
+                batch_op.drop_column(column)
+                batch_op.alter_column(f"{column}_code", new_column_name=column, nullable=nullable)
+    # No columns use these enumeration types anymore.
+    for _, names, type_name, _ in COLUMNS:
+        sa.Enum(*names, name=type_name).drop(op.get_bind(), checkfirst=True)
+
+
+def downgrade() -> None:
+    # `messagekind` type existed before regardless of events table.
+    sa.Enum(*MESSAGE_KINDS, name="messagekind").create(op.get_bind(), checkfirst=True)
+    if not _has_events_table():
+        return
+    for column, names, type_name, nullable in COLUMNS:
+        enum = sa.Enum(*names, name=type_name)
+        enum.create(op.get_bind(), checkfirst=True)
+        op.add_column("suppgram_events", sa.Column(f"{column}_name", enum))
+        cases = " ".join(f"WHEN {code} THEN '{name}'" for code, name in enumerate(names))
+        op.execute(f"UPDATE suppgram_events SET {column}_name = CASE {column} {cases} END")
+        with op.batch_alter_table("suppgram_events") as batch_op:
+            batch_op.drop_column(column)
+            batch_op.alter_column(f"{column}_name", new_column_name=column, nullable=nullable)
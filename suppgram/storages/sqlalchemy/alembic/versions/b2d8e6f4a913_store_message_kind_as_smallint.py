@@ -0,0 +1,42 @@
+"""Store message kind as small integer
+
+Revision ID: b2d8e6f4a913
+Revises: 7b4f1e2c9a85
+Create Date: 2026-10-15 23:04:51.172384
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b2d8e6f4a913"
+down_revision = "7b4f1e2c9a85"
+branch_labels = None
+depends_on = None
+
+
+KINDS = ["FROM_CUSTOMER", "FROM_AGENT", "POSTPONED", "RESOLVED"]
+
+# The `messagekind` enumeration type is also used by events table,
+# so unlike the column it is kept in place.
+
+
+def upgrade() -> None:
+    op.add_column("suppgram_conversation_messages", sa.Column("kind_code", sa.SmallInteger()))
+    cases = " ".join(f"WHEN '{kind}' THEN {code}" for code, kind in enumerate(KINDS))
+    op.execute(f"UPDATE suppgram_conversation_messages SET kind_code = CASE kind {cases} END")
+    with op.batch_alter_table("suppgram_conversation_messages") as batch_op:
+        batch_op.drop_column("kind")
+        batch_op.alter_column("kind_code", new_column_name="kind", nullable=False)
+
+
+def downgrade() -> None:
+    kind_enum = sa.Enum(*KINDS, name="messagekind")
+    kind_enum.create(op.get_bind(), checkfirst=True)
+    op.add_column("suppgram_conversation_messages", sa.Column("kind_name", kind_enum))
+    cases = " ".join(f"WHEN {code} THEN '{kind}'" for code, kind in enumerate(KINDS))
+    op.execute(f"UPDATE suppgram_conversation_messages SET kind_name = CASE kind {cases} END")
+    with op.batch_alter_table("suppgram_conversation_messages") as batch_op:
+        batch_op.drop_column("kind")
+        batch_op.alter_column("kind_name", new_column_name="kind", nullable=False)
@@ -0,0 +1,62 @@
+"""Use BIGINT message and event ids
+
+Revision ID: b6c2e8a4f913
+Revises: d3f6b9e1c527
+Create Date: 2026-10-16 00:47:09.530127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b6c2e8a4f913"
+down_revision = "d3f6b9e1c527"
+branch_labels = None
+depends_on = None
+
+
+def _tables_to_alter():
+    bind = op.get_bind()
+    # SQLite integer primary keys are 64-bit already, and changing
+    # their declared type would break autoincrement.
+    if bind.dialect.name == "sqlite":
+        return []
+    tables = ["suppgram_conversation_messages"]
+    # Events table used to be created by `SQLAlchemyStorage.initialize()` only.
+    if sa.inspect(bind).has_table("suppgram_events"):
+        tables.append("suppgram_events")
+    return tables
+
+
+def upgrade() -> None:
+    op.drop_index(
+        "ix_suppgram_conversation_messages_conversation_id", "suppgram_conversation_messages"
+    )
+    op.create_index(
+        "ix_suppgram_conversation_messages_conversation_id_id",
+        "suppgram_conversation_messages",
+        ["conversation_id", "id"],
+    )
+    postgresql = op.get_bind().dialect.name == "postgresql"
+    for table in _tables_to_alter():
+        op.alter_column(table, "id", existing_type=sa.Integer(), type_=sa.BigInteger())
+        if postgresql:
+            # Sequences created for SERIAL columns are limited to integers as well.
+            op.execute(f"ALTER SEQUENCE {table}_id_seq AS bigint")
+
+
+def downgrade() -> None:
+    postgresql = op.get_bind().dialect.name == "postgresql"
+    for table in _tables_to_alter():
+        if postgresql:
+            op.execute(f"ALTER SEQUENCE {table}_id_seq AS integer")
+        op.alter_column(table, "id", existing_type=sa.BigInteger(), type_=sa.Integer())
+    op.drop_index(
+        "ix_suppgram_conversation_messages_conversation_id_id", "suppgram_conversation_messages"
+    )
+    op.create_index(
+        "ix_suppgram_conversation_messages_conversation_id",
+        "suppgram_conversation_messages",
+        ["conversation_id"],
+    )
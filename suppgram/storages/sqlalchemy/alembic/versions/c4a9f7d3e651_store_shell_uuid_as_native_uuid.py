@@ -0,0 +1,38 @@
+"""Store shell UUID as native UUID
+
+Revision ID: c4a9f7d3e651
+Revises: b2d8e6f4a913
+Create Date: 2026-10-15 23:09:26.518903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c4a9f7d3e651"
+down_revision = "b2d8e6f4a913"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Values were stored as 32-character hex strings, which is also how
+    # `sa.Uuid` stores them on databases without native UUID type.
+    with op.batch_alter_table("suppgram_customers") as batch_op:
+        batch_op.alter_column(
+            "shell_uuid",
+            existing_type=sa.String(),
+            type_=sa.Uuid(),
+            postgresql_using="shell_uuid::uuid",
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("suppgram_customers") as batch_op:
+        batch_op.alter_column(
+            "shell_uuid",
+            existing_type=sa.Uuid(),
+            type_=sa.String(),
+            postgresql_using="replace(shell_uuid::text, '-', '')",
+        )
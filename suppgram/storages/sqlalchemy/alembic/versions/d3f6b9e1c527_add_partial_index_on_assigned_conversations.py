@@ -0,0 +1,31 @@
+"""Add partial index on assigned conversations
+
+Revision ID: d3f6b9e1c527
+Revises: a8e5c1f7d240
+Create Date: 2026-10-16 00:34:52.118064
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d3f6b9e1c527"
+down_revision = "a8e5c1f7d240"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    predicate = sa.text("assigned_workplace_id IS NOT NULL")
+    op.create_index(
+        "ix_suppgram_conversations_assigned_workplace_id",
+        "suppgram_conversations",
+        ["assigned_workplace_id"],
+        postgresql_where=predicate,
+        sqlite_where=predicate,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_suppgram_conversations_assigned_workplace_id", "suppgram_conversations")
@@ -0,0 +1,49 @@
+"""Store Telegram IDs as BIGINT
+
+Revision ID: e7c2a5f1b384
+Revises: c4a9f7d3e651
+Create Date: 2026-10-15 23:41:07.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e7c2a5f1b384"
+down_revision = "c4a9f7d3e651"
+branch_labels = None
+depends_on = None
+
+
+# Telegram user, bot and chat IDs may exceed 32 bits (e.g. supergroup chat IDs do).
+COLUMNS = [
+    ("suppgram_customers", "telegram_user_id", True),
+    ("suppgram_agents", "telegram_user_id", True),
+    ("suppgram_workplaces", "telegram_bot_id", False),
+    ("suppgram_telegram_chats", "telegram_chat_id", False),
+    ("suppgram_telegram_messages", "chat_id", False),
+    ("suppgram_telegram_messages", "telegram_bot_id", False),
+]
+
+
+def upgrade() -> None:
+    for table, column, nullable in COLUMNS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                column,
+                existing_type=sa.Integer(),
+                existing_nullable=nullable,
+                type_=sa.BigInteger(),
+            )
+
+
+def downgrade() -> None:
+    for table, column, nullable in reversed(COLUMNS):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                column,
+                existing_type=sa.BigInteger(),
+                existing_nullable=nullable,
+                type_=sa.Integer(),
+            )
@@ -0,0 +1,43 @@
+"""Add message lookup indexes
+
+Revision ID: f1d3b6a8c572
+Revises: e7c2a5f1b384
+Create Date: 2026-10-15 23:58:12.613094
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "f1d3b6a8c572"
+down_revision = "e7c2a5f1b384"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_suppgram_conversation_messages_conversation_id",
+        "suppgram_conversation_messages",
+        ["conversation_id"],
+    )
+    op.create_index(
+        "ix_suppgram_telegram_messages_chat_id_telegram_message_id",
+        "suppgram_telegram_messages",
+        ["chat_id", "telegram_message_id"],
+    )
+    op.create_index(
+        "ix_suppgram_telegram_messages_conversation_id",
+        "suppgram_telegram_messages",
+        ["conversation_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_suppgram_telegram_messages_conversation_id", "suppgram_telegram_messages")
+    op.drop_index(
+        "ix_suppgram_telegram_messages_chat_id_telegram_message_id", "suppgram_telegram_messages"
+    )
+    op.drop_index(
+        "ix_suppgram_conversation_messages_conversation_id", "suppgram_conversation_messages"
+    )
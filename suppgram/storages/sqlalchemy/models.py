@@ -1,21 +1,35 @@
+import warnings
 from datetime import datetime, timezone
-from typing import List, Any, Optional, Mapping, Dict
+from enum import Enum as EnumType
+from typing import List, Any, Optional, Mapping, Dict, Type, cast
 from uuid import UUID
 
 from sqlalchemy import (
+    BigInteger,
     Integer,
     String,
     ForeignKey,
     DateTime,
     Table,
     Column,
-    Enum,
     ColumnElement,
     Boolean,
+    SmallInteger,
+    TypeDecorator,
+    UniqueConstraint,
+    Index,
+    Row,
+    Connection,
+    inspect,
+    Uuid,
+    and_,
+    or_,
+    bindparam,
 )
 from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.orm import (
-    declarative_base,
+    DeclarativeBase,
+    contains_eager,
     Mapped,
     mapped_column,
     relationship,
@@ -48,45 +62,146 @@ from suppgram.entities import (
 )
 from suppgram.errors import AgentEmptyIdentification, WorkplaceEmptyIdentification
 
-Base = declarative_base()
 
+class Base(DeclarativeBase):
+    # Fetch server-generated values within the INSERT/UPDATE itself (via RETURNING
+    # where supported) instead of lazily loading them with a separate SELECT.
+    __mapper_args__ = {"eager_defaults": True}
 
+
+def create_missing_tables(conn: Connection, tables: List[Table]):
+    """Like `Base.metadata.create_all(conn, tables=tables)`, but checks for existing
+    tables with a single query per schema instead of one query per table."""
+    inspector = inspect(conn)
+    existing_names = {
+        schema: set(inspector.get_table_names(schema=schema))
+        for schema in {table.schema for table in tables}
+    }
+    missing_tables = [table for table in tables if table.name not in existing_names[table.schema]]
+    if missing_tables:
+        Base.metadata.create_all(conn, tables=missing_tables, checkfirst=False)
+
+
+class SmallIntegerEnum(TypeDecorator):
+    """Stores members of an enumeration as small integers.
+
+    Codes are stored in the database, so once assigned, they must never change;
+    new members should be given new codes."""
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum_type: Type[EnumType], codes: Mapping[Any, int]):
+        """
+        Parameters:
+            enum_type: enumeration type
+            codes: codes of all members of the enumeration
+        """
+        super().__init__()
+        if set(codes) != set(enum_type) or len(set(codes.values())) != len(codes):
+            raise ValueError(f"codes of {enum_type.__name__} members must be given and distinct")
+        self.enum_type = enum_type
+        # Tuple rather than mapping, as it is a part of the (hashable) statement cache key.
+        self.codes = tuple(codes.items())
+        self._codes = dict(codes)
+        self._members = {code: member for member, code in codes.items()}
+
+    def process_bind_param(self, value: Optional[EnumType], dialect: Any) -> Optional[int]:
+        return None if value is None else self._codes[self.enum_type(value)]
+
+    def process_result_value(self, value: Optional[int], dialect: Any) -> Optional[EnumType]:
+        return None if value is None else self._members[value]
+
+
+# Codes of enumeration members stored in the database. They are also hard-coded
+# in Alembic migrations, so they must never change.
+CONVERSATION_STATE_CODES: Mapping[ConversationState, int] = {
+    ConversationState.NEW: 0,
+    ConversationState.ASSIGNED: 1,
+    ConversationState.RESOLVED: 2,
+}
+MESSAGE_KIND_CODES: Mapping[MessageKind, int] = {
+    MessageKind.FROM_CUSTOMER: 0,
+    MessageKind.FROM_AGENT: 1,
+    MessageKind.POSTPONED: 2,
+    MessageKind.RESOLVED: 3,
+}
+# Event kinds are declared in alphabetical order, so their positions would
+# shift whenever a new kind is added.
+EVENT_KIND_CODES: Mapping[EventKind, int] = {
+    EventKind.AGENT_ASSIGNED: 0,
+    EventKind.CONVERSATION_POSTPONED: 1,
+    EventKind.CONVERSATION_RATED: 2,
+    EventKind.CONVERSATION_RESOLVED: 3,
+    EventKind.CONVERSATION_STARTED: 4,
+    EventKind.CONVERSATION_TAG_ADDED: 5,
+    EventKind.CONVERSATION_TAG_REMOVED: 6,
+    EventKind.MESSAGE_SENT: 7,
+}
+MESSAGE_MEDIA_KIND_CODES: Mapping[MessageMediaKind, int] = {
+    MessageMediaKind.NONE: 0,
+    MessageMediaKind.TEXT: 1,
+}
+
+
+# Relationships below are always loaded explicitly via loader options (see
+# `Models.make_conversation_options()`): implicit loads wouldn't work with async
+# sessions anyway. `lazy="raise"` on collections and `lazy="raise_on_sql"` on
+# many-to-one relationships (which may still be served from the identity map)
+# turn an accidental implicit load into a clear error.
 class Customer(Base):
     __tablename__ = "suppgram_customers"
+    __table_args__ = (
+        UniqueConstraint(
+            "pubnub_user_id",
+            "pubnub_channel_id",
+            name="suppgram_customers_pubnub_user_id_pubnub_channel_id_key",
+        ),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    telegram_user_id: Mapped[int] = mapped_column(Integer, nullable=True, unique=True)
+    telegram_user_id: Mapped[int] = mapped_column(BigInteger, nullable=True, unique=True)
     telegram_first_name: Mapped[str] = mapped_column(String, nullable=True)
     telegram_last_name: Mapped[str] = mapped_column(String, nullable=True)
     telegram_username: Mapped[str] = mapped_column(String, nullable=True)
-    shell_uuid: Mapped[str] = mapped_column(String, nullable=True, unique=True)
-    pubnub_user_id: Mapped[str] = mapped_column(
-        String, nullable=True
-    )  # TODO unique together with channel
+    shell_uuid: Mapped[UUID] = mapped_column(Uuid, nullable=True, unique=True)
+    pubnub_user_id: Mapped[str] = mapped_column(String, nullable=True)
     pubnub_channel_id: Mapped[str] = mapped_column(String, nullable=True)
-    conversations: Mapped[List["Conversation"]] = relationship(back_populates="customer")
+    conversations: Mapped[List["Conversation"]] = relationship(
+        back_populates="customer", lazy="raise"
+    )
 
 
 class Agent(Base):
     __tablename__ = "suppgram_agents"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     deactivated: Mapped[bool] = mapped_column(Boolean, default=False)
-    telegram_user_id: Mapped[int] = mapped_column(Integer, nullable=True, unique=True)
+    telegram_user_id: Mapped[int] = mapped_column(BigInteger, nullable=True, unique=True)
     telegram_first_name: Mapped[str] = mapped_column(String, nullable=True)
     telegram_last_name: Mapped[str] = mapped_column(String, nullable=True)
     telegram_username: Mapped[str] = mapped_column(String, nullable=True)
-    workplaces: Mapped[List["Workplace"]] = relationship(back_populates="agent")
+    workplaces: Mapped[List["Workplace"]] = relationship(back_populates="agent", lazy="raise")
     created_tags: Mapped[List["Tag"]] = relationship(
-        back_populates="created_by"
+        back_populates="created_by", lazy="raise"
     )  # `created_tags` is not really needed, but without it mypy terminates with an exception...
 
 
 class Workplace(Base):
     __tablename__ = "suppgram_workplaces"
+    __table_args__ = (
+        Index(
+            "ix_suppgram_workplaces_agent_id_telegram_bot_id",
+            "agent_id",
+            "telegram_bot_id",
+            unique=True,
+        ),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     agent_id: Mapped[int] = mapped_column(ForeignKey(Agent.id))
-    agent: Mapped[Agent] = relationship(back_populates="workplaces")
-    telegram_bot_id: Mapped[int] = mapped_column(Integer)
-    conversations: Mapped[List["Conversation"]] = relationship(back_populates="assigned_workplace")
+    agent: Mapped[Agent] = relationship(back_populates="workplaces", lazy="raise_on_sql")
+    telegram_bot_id: Mapped[int] = mapped_column(BigInteger)
+    conversations: Mapped[List["Conversation"]] = relationship(
+        back_populates="assigned_workplace", lazy="raise"
+    )
 
 
 class Tag(Base):
@@ -95,7 +210,7 @@ class Tag(Base):
     name: Mapped[str] = mapped_column(String, nullable=False, unique=True)
     created_at_utc: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     created_by_id: Mapped[int] = mapped_column(ForeignKey(Agent.id), nullable=False)
-    created_by: Mapped[Agent] = relationship(back_populates="created_tags")
+    created_by: Mapped[Agent] = relationship(back_populates="created_tags", lazy="raise_on_sql")
     # `back_populates` is not really needed, but without it mypy terminates with an exception...
 
 
@@ -109,43 +224,114 @@ association_table = Table(
 
 class Conversation(Base):
     __tablename__ = "suppgram_conversations"
+    __table_args__ = (Index("ix_suppgram_conversations_customer_id_state", "customer_id", "state"),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     customer_id: Mapped[int] = mapped_column(ForeignKey(Customer.id), nullable=False)
-    customer: Mapped[Customer] = relationship(back_populates="conversations")
-    tags: Mapped[List[Tag]] = relationship(secondary=association_table)
+    customer: Mapped[Customer] = relationship(back_populates="conversations", lazy="raise_on_sql")
+    tags: Mapped[List[Tag]] = relationship(secondary=association_table, lazy="raise")
     assigned_workplace_id: Mapped[int] = mapped_column(ForeignKey(Workplace.id), nullable=True)
-    assigned_workplace: Mapped[Workplace] = relationship(back_populates="conversations")
-    state: Mapped[ConversationState] = mapped_column(Enum(ConversationState), nullable=False)
-    messages: Mapped[List["ConversationMessage"]] = relationship(back_populates="conversation")
+    assigned_workplace: Mapped[Workplace] = relationship(
+        back_populates="conversations", lazy="raise_on_sql"
+    )
+    state: Mapped[ConversationState] = mapped_column(
+        SmallIntegerEnum(ConversationState, CONVERSATION_STATE_CODES), nullable=False
+    )
+    messages: Mapped[List["ConversationMessage"]] = relationship(
+        back_populates="conversation", lazy="raise", order_by="ConversationMessage.id"
+    )
     customer_rating: Mapped[int] = mapped_column(Integer, nullable=True)
 
 
+# Current conversations are a small fraction of all of them, so indexing only those
+# keeps the index small; the predicate matches `make_current_customer_conversation_filter()`.
+_current_conversations_predicate = and_(*(Conversation.state != state for state in FINAL_STATES))
+Index(
+    "ix_suppgram_conversations_current_customer_id",
+    Conversation.customer_id,
+    postgresql_where=_current_conversations_predicate,
+    sqlite_where=_current_conversations_predicate,
+)
+# Agent conversations are looked up by joining on the assigned workplace;
+# unassigned conversations never match such a join, so they are left out.
+_assigned_conversations_predicate = Conversation.assigned_workplace_id.isnot(None)
+Index(
+    "ix_suppgram_conversations_assigned_workplace_id",
+    Conversation.assigned_workplace_id,
+    postgresql_where=_assigned_conversations_predicate,
+    sqlite_where=_assigned_conversations_predicate,
+)
+
+
+# Messages and events are the fastest growing tables, so their primary keys are 64-bit.
+# SQLite only autoincrements `INTEGER PRIMARY KEY` columns, which are 64-bit anyway.
+_BigIntegerPrimaryKey = BigInteger().with_variant(Integer, "sqlite")
+
+
 class ConversationMessage(Base):
     __tablename__ = "suppgram_conversation_messages"
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # Messages are fetched per conversation ordered by id.
+    __table_args__ = (
+        Index("ix_suppgram_conversation_messages_conversation_id_id", "conversation_id", "id"),
+    )
+    id: Mapped[int] = mapped_column(_BigIntegerPrimaryKey, primary_key=True, autoincrement=True)
     conversation_id: Mapped[int] = mapped_column(ForeignKey(Conversation.id), nullable=False)
-    conversation: Mapped[Conversation] = relationship(back_populates="messages")
-    kind: Mapped[MessageKind] = mapped_column(Enum(MessageKind), nullable=False)
+    conversation: Mapped[Conversation] = relationship(back_populates="messages", lazy="raise")
+    kind: Mapped[MessageKind] = mapped_column(
+        SmallIntegerEnum(MessageKind, MESSAGE_KIND_CODES), nullable=False
+    )
     time_utc: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     text: Mapped[str] = mapped_column(String, nullable=True)
 
 
 class Event(Base):
     __tablename__ = "suppgram_events"
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    kind: Mapped[EventKind] = mapped_column(Enum(EventKind), nullable=False)
+    id: Mapped[int] = mapped_column(_BigIntegerPrimaryKey, primary_key=True, autoincrement=True)
+    kind: Mapped[EventKind] = mapped_column(
+        SmallIntegerEnum(EventKind, EVENT_KIND_CODES), nullable=False
+    )
     time_utc: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     agent_id: Mapped[int] = mapped_column(ForeignKey(Agent.id), nullable=True)
     conversation_id: Mapped[int] = mapped_column(ForeignKey(Conversation.id), nullable=True)
     customer_id: Mapped[int] = mapped_column(ForeignKey(Customer.id), nullable=True)
-    message_kind: Mapped[MessageKind] = mapped_column(Enum(MessageKind), nullable=True)
+    message_kind: Mapped[MessageKind] = mapped_column(
+        SmallIntegerEnum(MessageKind, MESSAGE_KIND_CODES), nullable=True
+    )
     message_media_kind: Mapped[MessageMediaKind] = mapped_column(
-        Enum(MessageMediaKind), nullable=True
+        SmallIntegerEnum(MessageMediaKind, MESSAGE_MEDIA_KIND_CODES), nullable=True
     )
     tag_id: Mapped[int] = mapped_column(ForeignKey(Tag.id), nullable=True)
     workplace_id: Mapped[int] = mapped_column(ForeignKey(Workplace.id), nullable=True)
 
 
+def _to_utc(time: datetime) -> datetime:
+    # Most callers pass `datetime.now(timezone.utc)`, which needs no conversion.
+    return time if time.tzinfo is timezone.utc else time.astimezone(timezone.utc)
+
+
+def _from_db_utc(time: datetime) -> datetime:
+    # Drivers return aware datetimes for `TIMESTAMP WITH TIME ZONE` columns,
+    # except for SQLite, which stores them naive.
+    return time if time.tzinfo is not None else time.replace(tzinfo=timezone.utc)
+
+
+# Filters replaced by explicit joins in storage queries; kept for compatibility.
+_UNUSED_FILTER_METHODS = [
+    "make_agent_workplaces_filter",
+    "make_workplace_conversation_filter",
+    "make_customer_conversations_filter",
+    "make_agent_conversations_filter",
+]
+
+
+def _make_insert_values_from_model(instance: Any) -> Mapping[str, Any]:
+    # Only attributes set explicitly, so that column defaults still apply.
+    return {
+        attr.key: getattr(instance, attr.key)
+        for attr in inspect(instance).mapper.column_attrs
+        if attr.key in instance.__dict__
+    }
+
+
 class Models:
     """Abstraction layer over SQLAlchemy models.
 
@@ -165,7 +351,7 @@ class Models:
     ):
         """
         Parameters:
-            engine: asynchronous SQLAlchemy engine
+            engine: asynchronous SQLAlchemy engine, e.g. created with `make_async_engine()`
             customer_model: SQLAlchemy model for customers
             agent_model: SQLAlchemy model for agents
             workplace_model: SQLAlchemy model for workplaces
@@ -183,6 +369,45 @@ class Models:
         self.tag_model = tag_model
         self.event_model = event_model
         self._conversation_tag_association_table = conversation_tag_association_table
+        if self._overrides("convert_to_message_model"):
+            warnings.warn(
+                "Models.convert_to_message_model() is deprecated, "
+                "override make_message_insert_values() instead",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+        if self._overrides("convert_to_event_model"):
+            warnings.warn(
+                "Models.convert_to_event_model() is deprecated, "
+                "override make_event_insert_values() instead",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+        for method_name in _UNUSED_FILTER_METHODS:
+            if self._overrides(method_name):
+                warnings.warn(
+                    f"Models.{method_name}() is deprecated and no longer used by the storage",
+                    DeprecationWarning,
+                    stacklevel=2,
+                )
+        # Built once: the predicate is the same for every customer lookup.
+        self._current_conversations_predicate = self._make_current_conversations_predicate()
+        # Loader options are built once per flag combination as well, so that
+        # statements using them hit SQLAlchemy compiled cache with the same objects.
+        self._conversation_options = {
+            (with_messages, with_customer): self._make_conversation_options(
+                with_messages, with_customer
+            )
+            for with_messages in (False, True)
+            for with_customer in (False, True)
+        }
+        self._assigned_conversation_options = {
+            with_messages: self._make_assigned_conversation_options(with_messages)
+            for with_messages in (False, True)
+        }
+
+    def _overrides(self, method_name: str) -> bool:
+        return getattr(type(self), method_name) is not getattr(Models, method_name)
 
     async def initialize(self):
         tables_to_create = [
@@ -202,18 +427,41 @@ class Models:
             if model_or_table is built_in_model_or_table
         ]
         async with self._engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all, tables=tables_to_create)
+            await conn.run_sync(create_missing_tables, tables_to_create)
 
     def convert_to_customer_model(self, identification: CustomerIdentification) -> Any:
         if identification.id is not None:
             raise ValueError("can't create customer with predefined ID")
         return self.customer_model(
             telegram_user_id=identification.telegram_user_id,
-            shell_uuid=identification.shell_uuid.hex if identification.shell_uuid else None,
+            shell_uuid=identification.shell_uuid,
             pubnub_user_id=identification.pubnub_user_id,
             pubnub_channel_id=identification.pubnub_channel_id,
         )
 
+    def make_customer_insert_values(
+        self, identification: CustomerIdentification, diff: Optional[CustomerDiff]
+    ) -> Mapping[str, Any]:
+        if identification.id is not None:
+            raise ValueError("can't create customer with predefined ID")
+        return {
+            "telegram_user_id": identification.telegram_user_id,
+            "shell_uuid": identification.shell_uuid,
+            "pubnub_user_id": identification.pubnub_user_id,
+            "pubnub_channel_id": identification.pubnub_channel_id,
+            **(self.make_customer_update_values(diff) if diff is not None else {}),
+        }
+
+    def make_customer_update_values(self, diff: CustomerDiff) -> Mapping[str, Any]:
+        result: Dict[str, Any] = {}
+        if diff.telegram_first_name is not None:
+            result["telegram_first_name"] = diff.telegram_first_name
+        if diff.telegram_last_name is not None:
+            result["telegram_last_name"] = diff.telegram_last_name
+        if diff.telegram_username is not None:
+            result["telegram_username"] = diff.telegram_username
+        return result
+
     def apply_diff_to_customer_model(self, model: Customer, diff: CustomerDiff):
         if diff.telegram_first_name is not None:
             model.telegram_first_name = diff.telegram_first_name
@@ -229,7 +477,7 @@ class Models:
             telegram_first_name=customer.telegram_first_name,
             telegram_last_name=customer.telegram_last_name,
             telegram_username=customer.telegram_username,
-            shell_uuid=UUID(customer.shell_uuid) if customer.shell_uuid else None,
+            shell_uuid=customer.shell_uuid,
             pubnub_user_id=customer.pubnub_user_id,
             pubnub_channel_id=customer.pubnub_channel_id,
         )
@@ -261,6 +509,21 @@ class Models:
             telegram_username=agent.telegram_username,
         )
 
+    def convert_from_agent_row(self, row: Row) -> AgentInterface:
+        """Like `convert_from_agent_model()`, but for a Core row selected from agent table.
+
+        Rows expose columns as attributes, so the model conversion is reused as is."""
+        return self.convert_from_agent_model(cast(Agent, row))
+
+    def convert_from_agent_model_cached(
+        self, agent: Agent, cache: Dict[Any, AgentInterface]
+    ) -> AgentInterface:
+        """Like `convert_from_agent_model()`, but reuses already converted agents from `cache`."""
+        result = cache.get(agent.id)
+        if result is None:
+            result = cache[agent.id] = self.convert_from_agent_model(agent)
+        return result
+
     def convert_to_workplace_model(
         self, agent_id: Any, identification: WorkplaceIdentification
     ) -> Any:
@@ -269,6 +532,11 @@ class Models:
             telegram_bot_id=identification.telegram_bot_id,
         )
 
+    def make_workplace_insert_values(
+        self, agent_id: Any, identification: WorkplaceIdentification
+    ) -> Mapping[str, Any]:
+        return {"agent_id": agent_id, "telegram_bot_id": identification.telegram_bot_id}
+
     def convert_from_workplace_model(
         self, agent: AgentInterface, workplace: Workplace
     ) -> WorkplaceInterface:
@@ -279,9 +547,21 @@ class Models:
             agent=agent,
         )
 
+    def convert_from_workplace_row(self, agent: AgentInterface, row: Row) -> WorkplaceInterface:
+        """Like `convert_from_workplace_model()`, but for a Core row selected from workplace table."""
+        return self.convert_from_workplace_model(agent, cast(Workplace, row))
+
     def convert_to_message_model(
         self, conversation_id: Any, message: ConversaionMessageInterface
     ) -> Any:
+        """Deprecated: messages are inserted without creating model instances,
+        override `make_message_insert_values()` instead."""
+        warnings.warn(
+            "Models.convert_to_message_model() is deprecated, "
+            "use make_message_insert_values() instead",
+            DeprecationWarning,
+            stacklevel=2,
+        )
         return self.conversation_message_model(
             conversation_id=conversation_id,
             kind=message.kind,
@@ -289,6 +569,21 @@ class Models:
             text=message.text,
         )
 
+    def make_message_insert_values(
+        self, conversation_id: Any, message: ConversaionMessageInterface
+    ) -> Mapping[str, Any]:
+        if self._overrides("convert_to_message_model"):
+            # Keep custom conversions working until the deprecated method is removed.
+            return _make_insert_values_from_model(
+                self.convert_to_message_model(conversation_id, message)
+            )
+        return {
+            "conversation_id": conversation_id,
+            "kind": message.kind,
+            "time_utc": message.time_utc,
+            "text": message.text,
+        }
+
     def convert_from_message_model(
         self, message: ConversationMessage
     ) -> ConversaionMessageInterface:
@@ -312,12 +607,27 @@ class Models:
         )
 
     def convert_from_conversation_model(
-        self, conversation: Conversation, with_messages: bool
+        self,
+        conversation: Conversation,
+        with_messages: bool,
+        agents_cache: Optional[Dict[Any, AgentInterface]] = None,
     ) -> ConversationInterface:
+        """
+        Parameters:
+            conversation: SQLAlchemy conversation model
+            with_messages: whether conversation messages have been loaded
+            agents_cache: already converted agents by their IDs. Pass the same dictionary
+                          when converting multiple conversations to share agent objects
+                          between them instead of converting each agent over and over.
+        """
+        if agents_cache is None:
+            agents_cache = {}
         assigned_agent: Optional[AgentInterface] = None
         assigned_workplace: Optional[WorkplaceInterface] = None
         if conversation.assigned_workplace:
-            assigned_agent = self.convert_from_agent_model(conversation.assigned_workplace.agent)
+            assigned_agent = self.convert_from_agent_model_cached(
+                conversation.assigned_workplace.agent, agents_cache
+            )
             assigned_workplace = self.convert_from_workplace_model(
                 assigned_agent, conversation.assigned_workplace
             )
@@ -326,7 +636,9 @@ class Models:
             state=conversation.state,
             customer=self.convert_from_customer_model(conversation.customer),
             tags=[
-                self.convert_from_tag_model(tag, self.convert_from_agent_model(tag.created_by))
+                self.convert_from_tag_model(
+                    tag, self.convert_from_agent_model_cached(tag.created_by, agents_cache)
+                )
                 for tag in conversation.tags
             ],
             assigned_agent=assigned_agent,
@@ -352,12 +664,35 @@ class Models:
             )
 
         if identification.shell_uuid is not None:
-            return model.shell_uuid == str(identification.shell_uuid)
+            return model.shell_uuid == identification.shell_uuid
 
         raise ValueError(
             f"received customer identification {identification} without supported non-null fields"
         )
 
+    def make_customer_conflict_columns(
+        self, identification: CustomerIdentification
+    ) -> Optional[List[Any]]:
+        """Returns columns of the unique constraint matching customer identification, if any.
+
+        Mirrors `make_customer_filter()`, so that upserting a customer conflicts
+        exactly with the row the filter would have found."""
+        model = self.customer_model
+
+        if identification.id is not None:
+            return None
+
+        if identification.telegram_user_id is not None:
+            return [model.telegram_user_id]
+
+        if identification.pubnub_user_id is not None:
+            return [model.pubnub_user_id, model.pubnub_channel_id]
+
+        if identification.shell_uuid is not None:
+            return [model.shell_uuid]
+
+        return None
+
     def make_agent_filter(self, identification: AgentIdentification) -> ColumnElement:
         model = self.agent_model
 
@@ -369,6 +704,16 @@ class Models:
 
         raise AgentEmptyIdentification(identification)
 
+    def make_agents_filter(self, identifications: List[AgentIdentification]) -> ColumnElement:
+        model = self.agent_model
+        ids = [i.id for i in identifications if i.id is not None]
+        telegram_user_ids = [
+            i.telegram_user_id
+            for i in identifications
+            if i.id is None and i.telegram_user_id is not None
+        ]
+        return or_(model.id.in_(ids), model.telegram_user_id.in_(telegram_user_ids))
+
     def make_workplace_filter(self, identification: WorkplaceIdentification) -> ColumnElement:
         workplace_model = self.workplace_model
         agent_model = self.agent_model
@@ -385,34 +730,74 @@ class Models:
         raise WorkplaceEmptyIdentification(identification)
 
     def make_agent_workplaces_filter(self, agent: AgentInterface) -> ColumnElement:
-        return self.workplace_model.agent_id == agent.id
-
-    def make_current_customer_conversation_filter(self, customer: CustomerInterface):
-        return (self.conversation_model.customer_id == customer.id) & (
-            ~self.conversation_model.state.in_(FINAL_STATES)
+        """Deprecated: no longer used by the storage."""
+        warnings.warn(
+            "Models.make_agent_workplaces_filter() is deprecated", DeprecationWarning, stacklevel=2
         )
+        return self.workplace_model.agent_id == agent.id
 
     def make_workplace_conversation_filter(
         self, identification: WorkplaceIdentification
     ) -> ColumnElement:
+        """Deprecated: no longer used by the storage."""
+        warnings.warn(
+            "Models.make_workplace_conversation_filter() is deprecated",
+            DeprecationWarning,
+            stacklevel=2,
+        )
         return self.make_workplace_filter(identification) & (
-            self.conversation_model.assigned_workplace_id == Workplace.id
+            self.conversation_model.assigned_workplace_id == self.workplace_model.id
         )
 
     def make_customer_conversations_filter(
         self, identification: CustomerIdentification
     ) -> ColumnElement:
+        """Deprecated: no longer used by the storage."""
+        warnings.warn(
+            "Models.make_customer_conversations_filter() is deprecated",
+            DeprecationWarning,
+            stacklevel=2,
+        )
         return self.make_customer_filter(identification) & (
             self.conversation_model.customer_id == self.customer_model.id
         )
 
     def make_agent_conversations_filter(self, identification: AgentIdentification) -> ColumnElement:
+        """Deprecated: no longer used by the storage."""
+        warnings.warn(
+            "Models.make_agent_conversations_filter() is deprecated",
+            DeprecationWarning,
+            stacklevel=2,
+        )
         return (
             self.make_agent_filter(identification)
             & (self.conversation_model.assigned_workplace_id == self.workplace_model.id)
             & (self.workplace_model.agent_id == self.agent_model.id)
         )
 
+    def make_current_customer_conversation_filter(self, customer: CustomerInterface):
+        return (
+            self.conversation_model.customer_id == customer.id
+        ) & self._current_conversations_predicate
+
+    def make_current_customers_conversations_filter(self, customers: List[CustomerInterface]):
+        return (
+            self.conversation_model.customer_id.in_([customer.id for customer in customers])
+            & self._current_conversations_predicate
+        )
+
+    def _make_current_conversations_predicate(self) -> ColumnElement:
+        # Plain inequalities rather than `NOT IN (...)`, with final states rendered
+        # inline instead of as bound parameters: this way the planner can match
+        # the filter against partial indexes on current conversations even when
+        # using generic plans of prepared statements.
+        return and_(
+            *(
+                self.conversation_model.state != bindparam(None, state, literal_execute=True)
+                for state in FINAL_STATES
+            )
+        )
+
     def make_conversations_filter(
         self, conversation_ids: List[Any], unassigned_only: bool = False
     ) -> ColumnElement:
@@ -421,16 +806,64 @@ class Models:
             result = result & (self.conversation_model.assigned_workplace_id == None)  # noqa
         return result
 
-    def make_conversation_options(self, with_messages: bool) -> List[LoaderOption]:
-        result: List[LoaderOption] = [
-            joinedload(self.conversation_model.customer),
-            selectinload(self.conversation_model.tags).joinedload(self.tag_model.created_by),
+    def make_conversation_messages_filter(
+        self, conversation: ConversationInterface
+    ) -> ColumnElement:
+        return self.conversation_message_model.conversation_id == conversation.id
+
+    def make_conversation_options(
+        self, with_messages: bool, with_customer: bool = True
+    ) -> List[LoaderOption]:
+        """
+        Parameters:
+            with_messages: whether to load conversation messages
+            with_customer: whether to load conversation customer; may be disabled
+                           when the customer is already known to the caller
+        """
+        return list(self._conversation_options[bool(with_messages), bool(with_customer)])
+
+    def make_assigned_conversation_options(self, with_messages: bool) -> List[LoaderOption]:
+        """Same as `make_conversation_options()`, but for queries already explicitly
+        joining conversations with their assigned workplaces and agents."""
+        return list(self._assigned_conversation_options[bool(with_messages)])
+
+    def _make_conversation_options(
+        self, with_messages: bool, with_customer: bool
+    ) -> List[LoaderOption]:
+        return [
             joinedload(self.conversation_model.assigned_workplace).joinedload(
                 self.workplace_model.agent
             ),
+            *self._make_common_conversation_options(with_messages, with_customer),
+        ]
+
+    def _make_assigned_conversation_options(self, with_messages: bool) -> List[LoaderOption]:
+        return [
+            contains_eager(self.conversation_model.assigned_workplace).contains_eager(
+                self.workplace_model.agent
+            ),
+            *self._make_common_conversation_options(with_messages, with_customer=True),
+        ]
+
+    def _make_common_conversation_options(
+        self, with_messages: bool, with_customer: bool
+    ) -> List[LoaderOption]:
+        result: List[LoaderOption] = [
+            # Tag creators are a small set of agents shared by many tags, so they are
+            # loaded by distinct IDs (skipping ones already loaded) instead of joined
+            # to every tag row.
+            selectinload(self.conversation_model.tags).selectinload(self.tag_model.created_by),
         ]
+        if with_customer:
+            result.append(joinedload(self.conversation_model.customer))
         if with_messages:
-            result.append(selectinload(self.conversation_model.messages))
+            message_model = self.conversation_message_model
+            result.append(
+                # Only the columns read by `convert_from_message_model()`.
+                selectinload(self.conversation_model.messages).load_only(
+                    message_model.kind, message_model.time_utc, message_model.text
+                )
+            )
         return result
 
     def make_conversation_update_values(self, diff: ConversationDiff) -> Mapping[str, Any]:
@@ -450,9 +883,16 @@ class Models:
         return result
 
     def convert_to_event_model(self, event: EventInterface) -> Event:
+        """Deprecated: events are inserted without creating model instances,
+        override `make_event_insert_values()` instead."""
+        warnings.warn(
+            "Models.convert_to_event_model() is deprecated, use make_event_insert_values() instead",
+            DeprecationWarning,
+            stacklevel=2,
+        )
         return self.event_model(
             kind=event.kind,
-            time_utc=event.time_utc.astimezone(timezone.utc),
+            time_utc=_to_utc(event.time_utc),
             agent_id=event.agent_id,
             conversation_id=event.conversation_id,
             customer_id=event.customer_id,
@@ -462,10 +902,26 @@ class Models:
             workplace_id=event.workplace_id,
         )
 
+    def make_event_insert_values(self, event: EventInterface) -> Mapping[str, Any]:
+        if self._overrides("convert_to_event_model"):
+            # Keep custom conversions working until the deprecated method is removed.
+            return _make_insert_values_from_model(self.convert_to_event_model(event))
+        return {
+            "kind": event.kind,
+            "time_utc": _to_utc(event.time_utc),
+            "agent_id": event.agent_id,
+            "conversation_id": event.conversation_id,
+            "customer_id": event.customer_id,
+            "message_kind": event.message_kind,
+            "message_media_kind": event.message_media_kind,
+            "tag_id": event.tag_id,
+            "workplace_id": event.workplace_id,
+        }
+
     def convert_from_event_model(self, event: Event) -> EventInterface:
         return EventInterface(
             kind=event.kind,
-            time_utc=event.time_utc.replace(tzinfo=timezone.utc),
+            time_utc=_from_db_utc(event.time_utc),
             agent_id=event.agent_id,
             conversation_id=event.conversation_id,
             customer_id=event.customer_id,
@@ -121,10 +121,17 @@ class StorageTestSuite(StorageTestSuiteFixtures, abc.ABC):
     @pytest.mark.asyncio
     async def test_create_or_update_shell_customer(self):
         uuid = uuid4()
-        telegram_customer = await self.storage.create_or_update_customer(
+        shell_customer = await self.storage.create_or_update_customer(
             CustomerIdentification(shell_uuid=uuid)
         )
-        assert telegram_customer.shell_uuid == uuid
+        assert shell_customer.shell_uuid == uuid
+
+        # Should be able to update by shell UUID.
+        updated_shell_customer = await self.storage.create_or_update_customer(
+            CustomerIdentification(shell_uuid=uuid), CustomerDiff(telegram_first_name="John")
+        )
+        assert updated_shell_customer.id == shell_customer.id
+        assert updated_shell_customer.telegram_first_name == "John"
 
     @pytest.mark.asyncio
     async def test_create_or_update_pubnub_customer(self):
@@ -301,6 +308,20 @@ class StorageTestSuite(StorageTestSuiteFixtures, abc.ABC):
         assert convs == [conv]
         assert convs[0].messages == []
 
+    @pytest.mark.asyncio
+    async def test_get_or_create_conversations(self, conversation: Conversation):
+        other_customer = await self.storage.create_or_update_customer(
+            CustomerIdentification(telegram_user_id=self.generate_telegram_id())
+        )
+        convs = await self.storage.get_or_create_conversations(
+            [other_customer, conversation.customer]
+        )
+        assert [c.customer.id for c in convs] == [other_customer.id, conversation.customer.id]
+        assert convs[0].state == ConversationState.NEW
+        assert convs[0].messages == []
+        assert convs[1].id == conversation.id
+        assert convs[0] == await self.storage.get_or_create_conversation(other_customer)
+
     @pytest.mark.asyncio
     async def test_count_conversations(self):
         await self.storage.count_all_conversations()
@@ -309,6 +330,10 @@ class StorageTestSuite(StorageTestSuiteFixtures, abc.ABC):
     async def test_update_non_existing_conversation(self):
         with pytest.raises(ConversationNotFound):
             await self.storage.update_conversation(self.generate_id(), ConversationDiff())
+        with pytest.raises(ConversationNotFound):
+            await self.storage.update_conversation(
+                self.generate_id(), ConversationDiff(state=ConversationState.RESOLVED)
+            )
 
     @pytest.mark.asyncio
     async def test_update_conversation(self, conversation: Conversation, workplace: Workplace):
@@ -422,6 +447,25 @@ class StorageTestSuite(StorageTestSuiteFixtures, abc.ABC):
         ]
         assert [m.text for m in updated_conv.messages] == ["Hi!", "Hello!"]
 
+    @pytest.mark.asyncio
+    async def test_save_messages(self, conversation: Conversation):
+        messages = [
+            Message(kind=MessageKind.FROM_CUSTOMER, time_utc=datetime.now(timezone.utc), text=text)
+            for text in ["Hi!", "Anyone here?"]
+        ]
+        await self.storage.save_messages(conversation, messages)
+
+        (updated_conv,) = await self.storage.find_conversations_by_ids(
+            [conversation.id], with_messages=True
+        )
+        assert [m.text for m in updated_conv.messages] == ["Hi!", "Anyone here?"]
+
+        await self.storage.save_messages(conversation, [])
+        (updated_conv,) = await self.storage.find_conversations_by_ids(
+            [conversation.id], with_messages=True
+        )
+        assert [m.text for m in updated_conv.messages] == ["Hi!", "Anyone here?"]
+
     @pytest.mark.asyncio
     async def test_events(self, conversation: Conversation, workplace: Workplace):
         assert await self._find_all_events() == []
@@ -444,5 +488,26 @@ class StorageTestSuite(StorageTestSuiteFixtures, abc.ABC):
         assert await self._find_all_events() == [event]
         assert await self.storage.count_all_events() == 1
 
+        other_events = [
+            Event(
+                kind=EventKind.MESSAGE_SENT,
+                time_utc=datetime.now(timezone.utc).replace(microsecond=0),
+                conversation_id=conversation.id,
+                message_kind=MessageKind.FROM_AGENT,
+            ),
+            Event(
+                kind=EventKind.CONVERSATION_RESOLVED,
+                time_utc=datetime.now(timezone.utc).replace(microsecond=0),
+                conversation_id=conversation.id,
+            ),
+        ]
+        await self.storage.save_events(other_events)
+
+        assert await self._find_all_events() == [event, *other_events]
+        assert await self.storage.count_all_events() == 3
+
+        await self.storage.save_events([])
+        assert await self.storage.count_all_events() == 3
+
     async def _find_all_events(self) -> List[Event]:
         return [event async for event in self.storage.find_all_events()]
@@ -1,13 +1,310 @@
-from typing import Any, Callable
+import asyncio
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Iterator, List
 
 import pytest
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine
 
+from suppgram.entities import (
+    Agent,
+    AgentDiff,
+    AgentIdentification,
+    Conversation,
+    ConversationDiff,
+    ConversationState,
+    Customer,
+    CustomerDiff,
+    CustomerIdentification,
+    Event,
+    EventKind,
+    Message,
+    MessageKind,
+    MessageMediaKind,
+    Workplace,
+    WorkplaceIdentification,
+)
+from suppgram import helpers
+from suppgram.errors import AgentNotFound, TagAlreadyExists
+from suppgram.storages.sqlalchemy import SQLAlchemyStorage
+from suppgram.storages.sqlalchemy.models import (
+    CONVERSATION_STATE_CODES,
+    EVENT_KIND_CODES,
+    MESSAGE_KIND_CODES,
+    MESSAGE_MEDIA_KIND_CODES,
+    Models,
+)
+from suppgram.storages.sqlalchemy.storage import (
+    CONVERSATION_IDS_BATCH_SIZE,
+    COPY_MIN_ROW_COUNT,
+)
 from tests.storage import StorageTestSuite
 
 pytest_plugins = ("pytest_asyncio",)
 
 
-class TestSQLAlchemyStorageWithSQLite(StorageTestSuite):
+@contextmanager
+def count_queries() -> Iterator[List[str]]:
+    """Collects SQL statements executed by any engine within the block, so that
+    tests can pin the number of queries per storage call and catch N+1 regressions."""
+    statements: List[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _customer_message(text: str) -> Message:
+    return Message(kind=MessageKind.FROM_CUSTOMER, time_utc=datetime.now(timezone.utc), text=text)
+
+
+def test_enum_codes():
+    # Codes are stored in existing databases and hard-coded in migrations;
+    # changing them would silently remap stored values.
+    assert CONVERSATION_STATE_CODES == {
+        ConversationState.NEW: 0,
+        ConversationState.ASSIGNED: 1,
+        ConversationState.RESOLVED: 2,
+    }
+    assert MESSAGE_KIND_CODES == {
+        MessageKind.FROM_CUSTOMER: 0,
+        MessageKind.FROM_AGENT: 1,
+        MessageKind.POSTPONED: 2,
+        MessageKind.RESOLVED: 3,
+    }
+    assert EVENT_KIND_CODES == {
+        EventKind.AGENT_ASSIGNED: 0,
+        EventKind.CONVERSATION_POSTPONED: 1,
+        EventKind.CONVERSATION_RATED: 2,
+        EventKind.CONVERSATION_RESOLVED: 3,
+        EventKind.CONVERSATION_STARTED: 4,
+        EventKind.CONVERSATION_TAG_ADDED: 5,
+        EventKind.CONVERSATION_TAG_REMOVED: 6,
+        EventKind.MESSAGE_SENT: 7,
+    }
+    assert MESSAGE_MEDIA_KIND_CODES == {MessageMediaKind.NONE: 0, MessageMediaKind.TEXT: 1}
+
+
+class SQLAlchemyStorageTestSuite(StorageTestSuite):
+    storage: SQLAlchemyStorage
+
+    @pytest.mark.asyncio
+    async def test_query_counts(self, conversation: Conversation, workplace: Workplace):
+        tag = await self.storage.create_tag(name="counted", created_by=workplace.agent)
+        await self.storage.update_conversation(
+            conversation.id,
+            ConversationDiff(
+                state=ConversationState.ASSIGNED,
+                assigned_workplace_id=workplace.id,
+                added_tags=[tag],
+            ),
+        )
+        for text in ["Hi!", "Hello!"]:
+            await self.storage.save_message(conversation, _customer_message(text))
+
+        # Conversation, messages, tags and tag authors.
+        with count_queries() as statements:
+            await self.storage.get_or_create_conversation(conversation.customer)
+        assert len(statements) == 4
+        with count_queries() as statements:
+            await self.storage.get_agent_conversation(workplace.identification)
+        assert len(statements) == 4
+        with count_queries() as statements:
+            await self.storage.get_agent_workplaces(workplace.agent)
+        assert len(statements) == 1
+
+    @pytest.mark.asyncio
+    async def test_create_or_update_customer_without_pubnub_channel(self):
+        identification = CustomerIdentification(pubnub_user_id=str(self.generate_telegram_id()))
+        customer = await self.storage.create_or_update_customer(identification)
+        assert await self.storage.create_or_update_customer(identification) == customer
+
+    @pytest.mark.asyncio
+    async def test_create_or_update_customer_without_diff(self):
+        identification = CustomerIdentification(telegram_user_id=self.generate_telegram_id())
+        customer = await self.storage.create_or_update_customer(identification)
+        with count_queries() as statements:
+            assert await self.storage.create_or_update_customer(identification) == customer
+        assert not [s for s in statements if s.startswith(("INSERT", "UPDATE"))]
+
+        customer = await self.storage.create_or_update_customer(
+            identification, CustomerDiff(telegram_first_name="Alice")
+        )
+        assert customer.telegram_first_name == "Alice"
+        assert await self.storage.create_or_update_customer(identification) == customer
+
+    @pytest.mark.asyncio
+    async def test_find_conversation_messages(self, conversation: Conversation):
+        texts = [f"Message #{i}" for i in range(5)]
+        for text in texts:
+            await self.storage.save_message(conversation, _customer_message(text))
+
+        messages = [
+            message async for message in self.storage.find_conversation_messages(conversation)
+        ]
+        assert [m.text for m in messages] == texts
+        assert all(m.kind == MessageKind.FROM_CUSTOMER for m in messages)
+
+        previews = [
+            preview
+            async for preview in self.storage.find_conversation_message_previews(conversation)
+        ]
+        assert previews == [(MessageKind.FROM_CUSTOMER, text) for text in texts]
+
+    @pytest.mark.asyncio
+    async def test_find_many_conversations_by_ids(self):
+        async with self.storage.transaction():
+            customers = [
+                await self.storage.create_or_update_customer(
+                    CustomerIdentification(telegram_user_id=self.generate_telegram_id())
+                )
+                for _ in range(CONVERSATION_IDS_BATCH_SIZE + 1)
+            ]
+            conversations = await self.storage.get_or_create_conversations(customers)
+        conversation_ids = [conversation.id for conversation in reversed(conversations)]
+        found = await self.storage.find_conversations_by_ids(conversation_ids)
+        assert [conversation.id for conversation in found] == conversation_ids
+
+    @pytest.mark.asyncio
+    async def test_save_messages_concurrently(self, conversation: Conversation):
+        other_conversation = await self.storage.get_or_create_conversation(
+            await self.storage.create_or_update_customer(
+                CustomerIdentification(telegram_user_id=self.generate_telegram_id())
+            )
+        )
+        conversations = [conversation, other_conversation, conversation]
+        with count_queries() as statements:
+            await asyncio.gather(
+                *(
+                    self.storage.save_message(conv, _customer_message(f"Message #{i}"))
+                    for i, conv in enumerate(conversations)
+                )
+            )
+        assert len([s for s in statements if s.startswith("INSERT")]) == 1
+
+        convs = await self.storage.find_conversations_by_ids(
+            [conversation.id, other_conversation.id], with_messages=True
+        )
+        assert [[m.text for m in conv.messages] for conv in convs] == [
+            ["Message #0", "Message #2"],
+            ["Message #1"],
+        ]
+
+    @pytest.mark.asyncio
+    async def test_save_many_messages(self, conversation: Conversation):
+        texts = [f"Message #{i}" for i in range(COPY_MIN_ROW_COUNT)]
+        await self.storage.save_messages(
+            conversation,
+            [_customer_message(text) for text in texts],
+        )
+        messages = [
+            message async for message in self.storage.find_conversation_messages(conversation)
+        ]
+        assert [m.text for m in messages] == texts
+        assert all(m.kind == MessageKind.FROM_CUSTOMER for m in messages)
+
+    @pytest.mark.asyncio
+    async def test_save_many_messages_rolled_back(self, conversation: Conversation):
+        # Large enough to be saved via `COPY` with asyncpg.
+        messages = [_customer_message(f"Message #{i}") for i in range(COPY_MIN_ROW_COUNT)]
+        with pytest.raises(RuntimeError):
+            async with self.storage.transaction():
+                await self.storage.save_messages(conversation, messages)
+                raise RuntimeError("rollback")
+        assert [m async for m in self.storage.find_conversation_messages(conversation)] == []
+
+    @pytest.mark.asyncio
+    async def test_transaction(self):
+        identification = AgentIdentification(telegram_user_id=self.generate_telegram_id())
+        with pytest.raises(RuntimeError):
+            async with self.storage.transaction():
+                agent = await self.storage.create_or_update_agent(identification)
+                assert await self.storage.get_agent(identification) == agent
+                raise RuntimeError("rollback")
+        with pytest.raises(AgentNotFound):
+            await self.storage.get_agent(identification)
+
+        async with self.storage.transaction():
+            agent = await self.storage.create_or_update_agent(identification)
+            workplace = await self.storage.get_or_create_workplace(
+                WorkplaceIdentification(
+                    telegram_user_id=agent.telegram_user_id,
+                    telegram_bot_id=self.generate_telegram_id(),
+                )
+            )
+        assert await self.storage.get_agent(identification) == agent
+        assert await self.storage.get_agent_workplaces(agent) == [workplace]
+
+    @pytest.mark.asyncio
+    async def test_transaction_with_many_messages(self, conversation: Conversation):
+        identification = AgentIdentification(telegram_user_id=self.generate_telegram_id())
+        # Large enough to be saved via `COPY` with asyncpg, and saved first within the
+        # transaction, before any other statement begins it.
+        messages = [_customer_message(f"Message #{i}") for i in range(COPY_MIN_ROW_COUNT)]
+        with pytest.raises(RuntimeError):
+            async with self.storage.transaction():
+                await self.storage.save_messages(conversation, messages)
+                await self.storage.create_or_update_agent(identification)
+                raise RuntimeError("rollback")
+        assert [m async for m in self.storage.find_conversation_messages(conversation)] == []
+        with pytest.raises(AgentNotFound):
+            await self.storage.get_agent(identification)
+
+        async with self.storage.transaction():
+            await self.storage.save_messages(conversation, messages)
+            agent = await self.storage.create_or_update_agent(identification)
+        saved_messages = [m async for m in self.storage.find_conversation_messages(conversation)]
+        assert len(saved_messages) == COPY_MIN_ROW_COUNT
+        assert await self.storage.get_agent(identification) == agent
+
+    @pytest.mark.asyncio
+    async def test_transaction_after_domain_error(self, workplace: Workplace):
+        async with self.storage.transaction():
+            await self.storage.create_tag("duplicate", created_by=workplace.agent)
+            with pytest.raises(TagAlreadyExists):
+                await self.storage.create_tag("duplicate", created_by=workplace.agent)
+            await self.storage.create_tag("unique", created_by=workplace.agent)
+            tag_names = [tag.name for tag in await self.storage.find_all_tags()]
+            assert {"duplicate", "unique"} <= set(tag_names)
+        assert [tag.name for tag in await self.storage.find_all_tags()] == tag_names
+
+    @pytest.mark.asyncio
+    async def test_get_agents_concurrently(self, agent: Agent):
+        other_agent = await self.storage.create_or_update_agent(
+            AgentIdentification(telegram_user_id=self.generate_telegram_id())
+        )
+        results = await asyncio.gather(
+            self.storage.get_agent(agent.identification),
+            self.storage.get_agent(
+                AgentIdentification(telegram_user_id=other_agent.telegram_user_id)
+            ),
+            self.storage.get_agent(AgentIdentification(id=self.generate_id())),
+            return_exceptions=True,
+        )
+        assert results[:2] == [agent, other_agent]
+        assert isinstance(results[2], AgentNotFound)
+
+    @pytest.mark.asyncio
+    async def test_get_or_create_workplace_concurrently(self, agent: Agent):
+        identification = WorkplaceIdentification(
+            telegram_user_id=agent.telegram_user_id, telegram_bot_id=self.generate_telegram_id()
+        )
+        first, second = await asyncio.gather(
+            self.storage.get_or_create_workplace(identification),
+            self.storage.get_or_create_workplace(identification),
+        )
+        assert first == second
+        assert await self.storage.get_agent_workplaces(agent) == [first]
+
+
+class TestSQLAlchemyStorageWithSQLite(SQLAlchemyStorageTestSuite):
     @pytest.fixture(autouse=True)
     def _create_storage(self, sqlite_sqlalchemy_storage):
         self.storage = sqlite_sqlalchemy_storage
@@ -19,8 +316,117 @@ class TestSQLAlchemyStorageWithSQLite(StorageTestSuite):
     def generate_id(self) -> Any:
         return self._generate_id()
 
+    @pytest.mark.asyncio
+    async def test_cache(self, sqlite_engine: AsyncEngine):
+        storage = SQLAlchemyStorage(sqlite_engine, Models(sqlite_engine), cache_ttl=60)
+        agent = await storage.create_or_update_agent(
+            AgentIdentification(telegram_user_id=self.generate_telegram_id())
+        )
+        workplace = await storage.get_or_create_workplace(
+            WorkplaceIdentification(
+                telegram_user_id=agent.telegram_user_id,
+                telegram_bot_id=self.generate_telegram_id(),
+            )
+        )
+        assert await storage.get_agent(agent.identification) == agent
+        assert await storage.get_workplace(workplace.identification) == workplace
+
+        agent = await storage.update_agent(
+            agent.identification, AgentDiff(telegram_first_name="Alice")
+        )
+        assert await storage.get_agent(agent.identification) == agent
+        assert (await storage.get_workplace(workplace.identification)).agent == agent
+
+    @pytest.mark.asyncio
+    async def test_cache_expiration(self, sqlite_engine: AsyncEngine, monkeypatch):
+        now = 1000.0
+        monkeypatch.setattr(helpers, "time", SimpleNamespace(monotonic=lambda: now))
+        storage = SQLAlchemyStorage(sqlite_engine, Models(sqlite_engine), cache_ttl=60)
+        agent = await storage.create_or_update_agent(
+            AgentIdentification(telegram_user_id=self.generate_telegram_id())
+        )
+        assert await storage.get_agent(agent.identification) == agent
+
+        # Changed bypassing the cached storage, e.g. by another process.
+        updated_agent = await self.storage.update_agent(
+            agent.identification, AgentDiff(telegram_first_name="Alice")
+        )
+        now += 59
+        with count_queries() as statements:
+            assert await storage.get_agent(agent.identification) == agent
+        assert statements == []
+
+        now += 2
+        with count_queries() as statements:
+            assert await storage.get_agent(agent.identification) == updated_agent
+        assert len(statements) == 1
+
+    @pytest.mark.asyncio
+    async def test_deprecated_convert_to_message_model(
+        self, sqlite_engine: AsyncEngine, conversation: Conversation
+    ):
+        class CustomModels(Models):
+            def convert_to_message_model(self, conversation_id, message):
+                with pytest.warns(DeprecationWarning):
+                    model = super().convert_to_message_model(conversation_id, message)
+                model.text = model.text.upper()
+                return model
+
+        with pytest.warns(DeprecationWarning):
+            models = CustomModels(sqlite_engine)
+        storage = SQLAlchemyStorage(sqlite_engine, models)
+        await storage.save_messages(
+            conversation,
+            [_customer_message("hi")],
+        )
+        messages = [message async for message in storage.find_conversation_messages(conversation)]
+        assert [m.text for m in messages] == ["HI"]
+
+    def test_deprecated_convert_to_event_model(self, sqlite_engine: AsyncEngine):
+        class CustomModels(Models):
+            def convert_to_event_model(self, event):
+                with pytest.warns(DeprecationWarning):
+                    model = super().convert_to_event_model(event)
+                model.tag_id = None
+                return model
+
+        with pytest.warns(DeprecationWarning):
+            models = CustomModels(sqlite_engine)
+        event = Event(kind=EventKind.CONVERSATION_TAG_ADDED, conversation_id=1, tag_id=2)
+        values = models.make_event_insert_values(event)
+        assert values["kind"] == EventKind.CONVERSATION_TAG_ADDED
+        assert values["conversation_id"] == 1
+        assert values["tag_id"] is None
+
+    def test_deprecated_filters(
+        self, sqlite_engine: AsyncEngine, customer: Customer, workplace: Workplace
+    ):
+        models = Models(sqlite_engine)
+        with pytest.warns(DeprecationWarning):
+            filter_ = models.make_agent_workplaces_filter(workplace.agent)
+        assert filter_.compare(models.workplace_model.agent_id == workplace.agent.id)
+        with pytest.warns(DeprecationWarning):
+            filter_ = models.make_workplace_conversation_filter(workplace.identification)
+        assert filter_.compare(
+            models.make_workplace_filter(workplace.identification)
+            & (models.conversation_model.assigned_workplace_id == models.workplace_model.id)
+        )
+        with pytest.warns(DeprecationWarning):
+            filter_ = models.make_agent_conversations_filter(workplace.agent.identification)
+        assert filter_.compare(
+            models.make_agent_filter(workplace.agent.identification)
+            & (models.conversation_model.assigned_workplace_id == models.workplace_model.id)
+            & (models.workplace_model.agent_id == models.agent_model.id)
+        )
+        with pytest.warns(DeprecationWarning):
+            filter_ = models.make_customer_conversations_filter(customer.identification)
+        assert filter_.compare(
+            models.make_customer_filter(customer.identification)
+            & (models.conversation_model.customer_id == models.customer_model.id)
+        )
+
 
-class TestSQLAlchemyStorageWithPostgreSQL(StorageTestSuite):
+class TestSQLAlchemyStorageWithPostgreSQL(SQLAlchemyStorageTestSuite):
     @pytest.fixture(autouse=True)
     def _create_storage(self, postgresql_sqlalchemy_storage):
         self.storage = postgresql_sqlalchemy_storage
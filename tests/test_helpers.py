@@ -0,0 +1,32 @@
+import asyncio
+from typing import List, Mapping, Optional
+
+import pytest
+
+from suppgram.helpers import BatchLoader, BatchWriter
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+@pytest.mark.asyncio
+async def test_batch_writer_cancelled():
+    async def write_batch(items: List[int]) -> List[Optional[Exception]]:
+        raise asyncio.CancelledError()
+
+    writer = BatchWriter(write_batch)
+    results = await asyncio.wait_for(
+        asyncio.gather(writer.write(1), writer.write(2), return_exceptions=True), timeout=1
+    )
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_batch_loader_cancelled():
+    async def load_batch(keys: List[int]) -> Mapping[int, str]:
+        raise asyncio.CancelledError()
+
+    loader = BatchLoader(load_batch)
+    results = await asyncio.wait_for(
+        asyncio.gather(loader.load(1), loader.load(2), return_exceptions=True), timeout=1
+    )
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)